@@ -1,18 +1,35 @@
 """Configuration management using environment variables."""
 
+import logging
 import os
 from typing import Optional
 
 
+def _parse_log_level(name: str) -> int:
+    """Resolve a level name such as "info" to its numeric logging level."""
+    try:
+        return logging.getLevelNamesMapping()[name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown LOG_LEVEL: {name!r}") from None
+
+
 class Config:
     """Application configuration from environment variables."""
 
     WEBHOOK_SECRET: Optional[str] = os.getenv("WEBHOOK_SECRET")
+    WEBHOOK_SECRET_BYTES: bytes = (os.getenv("WEBHOOK_SECRET") or "").encode()
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:////data/app.db")
+    MAX_BODY_BYTES: int = int(os.getenv("MAX_BODY_BYTES", "65536"))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL_INT: int = _parse_log_level(LOG_LEVEL)
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
 
+    @property
+    def DB_PATH(self) -> str:
+        """File path parsed from DATABASE_URL."""
+        return self.DATABASE_URL.replace("sqlite:///", "")
+
     @classmethod
     def validate(cls) -> bool:
         """Validate critical configuration."""
@@ -1,22 +1,32 @@
 """Structured JSON logging."""
 
-import json
+import atexit
+import io
 import logging
+import queue
+import sys
 import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, Optional
 
+import orjson
+
 from app.config import config
 
+# Buffer size for the binary log stream; flushed whenever the queue drains
+LOG_BUFFER_SIZE = 64 * 1024
+
 
 class StructuredJsonFormatter(logging.Formatter):
     """Formatter that outputs structured JSON logs."""
 
-    def format(self, record: logging.LogRecord) -> str:
-        """Format log record as JSON."""
+    def log_data(self, record: logging.LogRecord) -> Dict[str, Any]:
+        """Collect the structured fields of a log record."""
         log_data: Dict[str, Any] = {
-            "ts": datetime.utcnow().isoformat() + "Z",
+            # Event time, not format time: formatting runs on the listener thread
+            "ts": datetime.fromtimestamp(record.created, timezone.utc),
             "level": record.levelname,
             "message": record.getMessage(),
         }
@@ -39,23 +49,90 @@ class StructuredJsonFormatter(logging.Formatter):
         if hasattr(record, "result"):
             log_data["result"] = record.result
 
-        return json.dumps(log_data)
+        return log_data
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format log record as JSON."""
+        return orjson.dumps(self.log_data(record), option=orjson.OPT_UTC_Z).decode()
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        """Format log record as a newline-terminated JSON line in bytes."""
+        return orjson.dumps(
+            self.log_data(record),
+            option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE,
+        )
+
+
+class JsonStreamHandler(logging.StreamHandler):
+    """Stream handler that writes orjson bytes to a binary stream."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write the record without a str -> bytes round trip."""
+        try:
+            self.stream.write(self.formatter.format_bytes(record))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class FlushingQueueListener(QueueListener):
+    """Queue listener that flushes its handlers once the queue is drained."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        """Handle a record, flushing buffered output after each burst."""
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
 
 
 def setup_logging() -> logging.Logger:
-    """Configure structured JSON logging."""
-    logger = logging.getLogger("webhook_app")
-    logger.setLevel(config.LOG_LEVEL)
+    """
+    Configure structured JSON logging.
 
-    handler = logging.StreamHandler()
+    Request handlers only enqueue records; formatting and writing to
+    stdout happen on a background listener thread.
+    """
+    logger = logging.getLogger("webhook_app")
+    logger.setLevel(config.LOG_LEVEL_INT)
+
+    stdout_buffer = getattr(sys.stdout, "buffer", None)
+    stream: Optional[io.BufferedWriter] = None
+    handler: logging.StreamHandler
+    if stdout_buffer is not None:
+        # Batch writes on top of stdout's binary layer; no raw fd required
+        stream = io.BufferedWriter(stdout_buffer, LOG_BUFFER_SIZE)
+        handler = JsonStreamHandler(stream)
+    else:
+        # Text-only stdout (e.g. a StringIO replacement): write formatted str
+        handler = logging.StreamHandler(sys.stdout)
     formatter = StructuredJsonFormatter()
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = FlushingQueueListener(log_queue, handler)
+    listener.start()
+
+    def shutdown_listener() -> None:
+        listener.stop()
+        try:
+            handler.flush()
+            if stream is not None:
+                # Don't let the wrapper close sys.stdout when it is collected
+                stream.detach()
+        except ValueError:
+            pass  # stdout already closed, e.g. by a test runner's capture
+
+    atexit.register(shutdown_listener)
 
     return logger
 
 
 logger = setup_logging()
+_is_enabled_for = logger.isEnabledFor
 
 
 def log_request(
@@ -67,6 +144,10 @@ def log_request(
     **extra: Any,
 ) -> None:
     """Log HTTP request with structured data."""
+    # logger.handle() skips the level check, so apply it before building the record
+    if not _is_enabled_for(logging.INFO):
+        return
+
     if request_id is None:
         request_id = str(uuid.uuid4())
 
@@ -95,6 +176,9 @@ def log_error(
     message: str, request_id: Optional[str] = None, **extra: Any
 ) -> None:
     """Log error with structured data."""
+    if not _is_enabled_for(logging.ERROR):
+        return
+
     if request_id is None:
         request_id = str(uuid.uuid4())
 
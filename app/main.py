@@ -2,36 +2,84 @@
 
 import hashlib
 import hmac
+import re
 import time
 import uuid
-from typing import Optional
+from typing import Any, Optional, Tuple
 
-from fastapi import FastAPI, Header, HTTPException, Request, status
-from fastapi.responses import PlainTextResponse
+from fastapi import FastAPI, Header, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from pydantic import ValidationError
 
 from app.config import config
 from app.logging_utils import log_error, log_request
 from app.metrics import metrics
 from app.models import (
-    Message,
     MessagesResponse,
-    SenderStats,
     StatsResponse,
     WebhookMessage,
     WebhookResponse,
 )
-from app.storage import get_messages, get_stats, init_db, insert_message, is_db_ready
+from app.storage import (
+    close_pool,
+    get_messages,
+    get_stats,
+    init_db,
+    insert_message,
+    is_db_ready,
+    stop_writer,
+)
+
+# Exactly one hex-encoded SHA-256 digest; bytes.fromhex alone skips whitespace
+_SIGNATURE_RE = re.compile(r"[0-9a-fA-F]{64}")
 
 # Initialize app
-app = FastAPI(title="Lyftr Webhook API", version="1.0.0")
+app = FastAPI(
+    title="Lyftr Webhook API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+
+# SHA-256 block size in bytes, used to pad the HMAC key
+SHA256_BLOCK_SIZE = 64
+
+# Bound once so signature verification skips repeated attribute lookups
+_compare_digest = hmac.compare_digest
+_fromhex = bytes.fromhex
+
+
+def build_hmac_pads(secret: bytes) -> Tuple[Any, Any]:
+    """
+    Precompute HMAC-SHA256 key pads for a fixed secret.
+
+    Returns SHA-256 states that have already absorbed key XOR ipad and
+    key XOR opad, so each verification only needs to copy them.
+    """
+    if len(secret) > SHA256_BLOCK_SIZE:
+        secret = hashlib.sha256(secret).digest()
+    key = secret.ljust(SHA256_BLOCK_SIZE, b"\x00")
+
+    inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+    outer = hashlib.sha256(bytes(b ^ 0x5C for b in key))
+    return inner, outer
 
 
 @app.on_event("startup")
 async def startup() -> None:
-    """Initialize database on startup."""
+    """Initialize database and signature state on startup."""
     if not config.validate():
         raise RuntimeError("WEBHOOK_SECRET must be set and non-empty")
     init_db()
+    app.state.hmac_pads = build_hmac_pads(config.WEBHOOK_SECRET_BYTES)
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """Flush pending writes and release pooled database connections."""
+    stop_writer()
+    close_pool()
 
 
 @app.middleware("http")
@@ -63,25 +111,47 @@ async def logging_middleware(request: Request, call_next):
     return response
 
 
-@app.post("/webhook", response_model=WebhookResponse, status_code=200)
+def _reject_too_large(request_id: str) -> None:
+    """Record and reject a webhook body larger than MAX_BODY_BYTES."""
+    metrics.increment_webhook_request("too_large")
+    log_error(
+        "Request body too large",
+        request_id=request_id,
+    )
+    raise HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="payload too large",
+    )
+
+
+@app.post(
+    "/webhook",
+    response_model=WebhookResponse,
+    status_code=200,
+    # The body is parsed by hand after signature checks; document it here
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": WebhookMessage.model_json_schema()}
+            },
+        }
+    },
+)
 async def webhook(
-    payload: WebhookMessage,
     request: Request,
     x_signature: Optional[str] = Header(None),
 ) -> WebhookResponse:
     """
     Ingest WhatsApp-like messages with HMAC-SHA256 signature verification.
 
-    - Validates X-Signature header
+    - Validates X-Signature header before the body is parsed
     - Prevents duplicate messages via message_id primary key
     - Returns { "status": "ok" } for both new and duplicate valid messages
     """
     request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
 
-    # Read raw body
-    body = await request.body()
-
-    # Verify signature
+    # Verify signature header is present before touching the body
     if not x_signature:
         metrics.increment_webhook_request("invalid_signature")
         log_error(
@@ -93,14 +163,39 @@ async def webhook(
             detail="invalid signature",
         )
 
-    # Compute HMAC
-    expected_signature = hmac.new(
-        config.WEBHOOK_SECRET.encode(),
-        body,
-        hashlib.sha256,
-    ).hexdigest()
-
-    if not hmac.compare_digest(expected_signature, x_signature):
+    # Reject oversized payloads by declared length before reading anything;
+    # an unparsable Content-Length is treated as missing
+    try:
+        declared_length = int(request.headers.get("content-length", ""))
+    except ValueError:
+        declared_length = 0
+    if declared_length > config.MAX_BODY_BYTES:
+        _reject_too_large(request_id)
+
+    # Read raw body, stopping as soon as it outgrows the limit (chunked uploads)
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > config.MAX_BODY_BYTES:
+            _reject_too_large(request_id)
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    # Compute HMAC from the precomputed key pads
+    inner_pad, outer_pad = request.app.state.hmac_pads
+    inner = inner_pad.copy()
+    inner.update(body)
+    outer = outer_pad.copy()
+    outer.update(inner.digest())
+    expected_signature = outer.digest()
+
+    if _SIGNATURE_RE.fullmatch(x_signature):
+        provided_signature = _fromhex(x_signature)
+    else:
+        provided_signature = b""
+
+    if not _compare_digest(expected_signature, provided_signature):
         metrics.increment_webhook_request("invalid_signature")
         log_error(
             "Invalid X-Signature",
@@ -111,8 +206,17 @@ async def webhook(
             detail="invalid signature",
         )
 
-    # Signature valid, attempt insert
-    success, is_duplicate = insert_message(
+    # Signature valid: parse and validate the raw body in a single pass
+    try:
+        payload = WebhookMessage.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors()],
+            body=body,
+        )
+
+    # Attempt insert
+    success, is_duplicate = await insert_message(
         message_id=payload.message_id,
         from_msisdn=payload.from_msisdn,
         to_msisdn=payload.to_msisdn,
@@ -139,14 +243,14 @@ async def webhook(
     return WebhookResponse(status="ok")
 
 
-@app.get("/messages", response_model=MessagesResponse)
+@app.get("/messages", responses={200: {"model": MessagesResponse}})
 async def messages(
     limit: int = 50,
     offset: int = 0,
-    from_msisdn: Optional[str] = None,
+    from_msisdn: Optional[str] = Query(None, alias="from"),
     since: Optional[str] = None,
     q: Optional[str] = None,
-) -> MessagesResponse:
+) -> ORJSONResponse:
     """
     Retrieve paginated, filterable messages.
 
@@ -178,28 +282,31 @@ async def messages(
         q=q,
     )
 
-    messages_list = [
-        Message(
-            message_id=row["message_id"],
-            from_msisdn=row["from_msisdn"],
-            to_msisdn=row["to_msisdn"],
-            ts=row["ts"],
-            text=row["text"],
-            created_at=row["created_at"],
-        )
-        for row in rows
+    # Rows come straight from SQLite; skip response-model re-validation
+    data = [
+        {
+            "message_id": message_id,
+            "from_msisdn": sender,
+            "to_msisdn": recipient,
+            "ts": ts,
+            "text": text,
+            "created_at": created_at,
+        }
+        for message_id, sender, recipient, ts, text, created_at in rows
     ]
 
-    return MessagesResponse(
-        data=messages_list,
-        total=total,
-        limit=limit,
-        offset=offset,
+    return ORJSONResponse(
+        {
+            "data": data,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+        }
     )
 
 
-@app.get("/stats", response_model=StatsResponse)
-async def stats() -> StatsResponse:
+@app.get("/stats", responses={200: {"model": StatsResponse}})
+async def stats() -> ORJSONResponse:
     """
     Retrieve analytics and statistics.
 
@@ -210,20 +317,7 @@ async def stats() -> StatsResponse:
     - first_message_ts: Earliest message timestamp
     - last_message_ts: Latest message timestamp
     """
-    stats_data = get_stats()
-
-    senders = [
-        SenderStats(from_msisdn=s["from"], count=s["count"])
-        for s in stats_data["messages_per_sender"]
-    ]
-
-    return StatsResponse(
-        total_messages=stats_data["total_messages"],
-        senders_count=stats_data["senders_count"],
-        messages_per_sender=senders,
-        first_message_ts=stats_data["first_message_ts"],
-        last_message_ts=stats_data["last_message_ts"],
-    )
+    return ORJSONResponse(get_stats())
 
 
 @app.get("/health/live", status_code=200)
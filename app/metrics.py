@@ -1,6 +1,17 @@
 """Prometheus metrics collection and exposition."""
 
-from typing import Dict
+import threading
+from collections import defaultdict
+from typing import DefaultDict, Dict
+
+HTTP_REQUESTS_HEADER = (
+    b"# HELP http_requests_total Total HTTP requests by method, path, and status\n"
+    b"# TYPE http_requests_total counter\n"
+)
+WEBHOOK_REQUESTS_HEADER = (
+    b"# HELP webhook_requests_total Total webhook requests by result\n"
+    b"# TYPE webhook_requests_total counter\n"
+)
 
 
 class MetricsCollector:
@@ -8,44 +19,57 @@ class MetricsCollector:
 
     def __init__(self):
         # Counters: {(method, path, status): count}
-        self.http_requests_total: Dict[tuple, int] = {}
+        self.http_requests_total: DefaultDict[tuple, int] = defaultdict(int)
         # Counters: {result: count}
-        self.webhook_requests_total: Dict[str, int] = {}
+        self.webhook_requests_total: DefaultDict[str, int] = defaultdict(int)
+        # Guards counter updates from concurrent threads
+        self._lock = threading.Lock()
+        # Rendered "name{labels} " prefixes; label sets never change per key
+        self._http_label_cache: Dict[tuple, bytes] = {}
+        self._webhook_label_cache: Dict[str, bytes] = {}
 
     def increment_http_request(self, method: str, path: str, status: int) -> None:
         """Increment HTTP request counter."""
-        key = (method, path, status)
-        self.http_requests_total[key] = self.http_requests_total.get(key, 0) + 1
+        with self._lock:
+            self.http_requests_total[(method, path, status)] += 1
 
     def increment_webhook_request(self, result: str) -> None:
         """Increment webhook request counter by result."""
-        self.webhook_requests_total[result] = (
-            self.webhook_requests_total.get(result, 0) + 1
-        )
+        with self._lock:
+            self.webhook_requests_total[result] += 1
 
-    def render_prometheus(self) -> str:
+    def render_prometheus(self) -> bytes:
         """Render metrics in Prometheus text exposition format."""
-        lines = [
-            "# HELP http_requests_total Total HTTP requests by method, path, and status",
-            "# TYPE http_requests_total counter",
-        ]
-
-        for (method, path, status), count in sorted(
-            self.http_requests_total.items()
-        ):
-            lines.append(
-                f'http_requests_total{{method="{method}",path="{path}",status="{status}"}} {count}'
-            )
-
-        lines.append(
-            "# HELP webhook_requests_total Total webhook requests by result"
-        )
-        lines.append("# TYPE webhook_requests_total counter")
-
-        for result, count in sorted(self.webhook_requests_total.items()):
-            lines.append(f'webhook_requests_total{{result="{result}"}} {count}')
-
-        return "\n".join(lines) + "\n"
+        with self._lock:
+            http_requests = sorted(self.http_requests_total.items())
+            webhook_requests = sorted(self.webhook_requests_total.items())
+
+        buf = bytearray(HTTP_REQUESTS_HEADER)
+
+        http_labels = self._http_label_cache
+        for key, count in http_requests:
+            prefix = http_labels.get(key)
+            if prefix is None:
+                method, path, status = key
+                prefix = http_labels[key] = (
+                    f'http_requests_total{{method="{method}",path="{path}",status="{status}"}} '
+                ).encode()
+            buf += prefix
+            buf += b"%d\n" % count
+
+        buf += WEBHOOK_REQUESTS_HEADER
+
+        webhook_labels = self._webhook_label_cache
+        for result, count in webhook_requests:
+            prefix = webhook_labels.get(result)
+            if prefix is None:
+                prefix = webhook_labels[result] = (
+                    f'webhook_requests_total{{result="{result}"}} '
+                ).encode()
+            buf += prefix
+            buf += b"%d\n" % count
+
+        return bytes(buf)
 
 
 metrics = MetricsCollector()
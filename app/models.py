@@ -1,10 +1,20 @@
 """Pydantic models for request/response validation."""
 
+import re
 from datetime import datetime
 from typing import List, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
+# E.164-style number: '+' followed by ASCII digits only
+_MSISDN_RE = re.compile(r"\+[0-9]+")
+# Common ISO-8601 UTC form (YYYY-MM-DDTHH:MM:SS[.f]Z). Days stop at 28 so
+# every match is a real calendar date; anything else takes the full parse.
+_TS_FAST_RE = re.compile(
+    r"[1-9][0-9]{3}-(?:0[1-9]|1[0-2])-(?:0[1-9]|1[0-9]|2[0-8])"
+    r"T(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9](?:\.[0-9]+)?Z"
+)
+
 
 class WebhookMessage(BaseModel):
     """Inbound webhook message."""
@@ -22,9 +32,9 @@ class WebhookMessage(BaseModel):
     @classmethod
     def validate_msisdn(cls, v: str) -> str:
         """Validate phone numbers: must start with + and contain only digits after."""
-        if not v.startswith("+"):
-            raise ValueError("Phone number must start with '+'")
-        if not v[1:].isdigit():
+        if _MSISDN_RE.fullmatch(v) is None:
+            if not v.startswith("+"):
+                raise ValueError("Phone number must start with '+'")
             raise ValueError("Phone number must contain only digits after '+'")
         return v
 
@@ -32,6 +42,8 @@ class WebhookMessage(BaseModel):
     @classmethod
     def validate_ts(cls, v: str) -> str:
         """Validate ISO-8601 UTC timestamp with Z suffix."""
+        if _TS_FAST_RE.fullmatch(v) is not None:
+            return v
         if not v.endswith("Z"):
             raise ValueError("Timestamp must end with 'Z' (UTC)")
         try:
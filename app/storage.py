@@ -1,60 +1,307 @@
 """Database storage operations."""
 
+import asyncio
+import queue
 import sqlite3
-from datetime import datetime
-from typing import List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from app.config import config
 
+# Maximum number of inserts committed in a single write transaction
+WRITE_BATCH_MAX = 256
+
+# Prepared once per connection and reused from SQLite's statement cache
+INSERT_MESSAGE_SQL = """
+    INSERT OR IGNORE INTO messages
+        (message_id, from_msisdn, to_msisdn, ts, text, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Idle connections, reused across requests instead of reconnecting each time
+_pool: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+
+# Pending inserts for the writer thread: (row, future) or None to stop
+_write_queue: "queue.SimpleQueue[Optional[Tuple[tuple, Future]]]" = queue.SimpleQueue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS.") for the most recent timestamp
+_ts_prefix_cache: Tuple[int, str] = (-1, "")
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a database connection with per-connection pragmas applied."""
+    conn = sqlite3.connect(
+        config.DB_PATH, check_same_thread=False, cached_statements=256
+    )
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+@contextmanager
+def _acquire() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled connection, opening a new one if none is idle."""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+
+    try:
+        yield conn
+    finally:
+        # Never hand a connection with an open write transaction back out
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put(conn)
+
+
+def close_pool() -> None:
+    """Close all idle pooled connections."""
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            return
+        conn.close()
+
 
 def init_db() -> None:
     """Initialize database schema."""
-    db_path = config.DATABASE_URL.replace("sqlite:///", "")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    # Drop connections that may point at a previously configured database
+    stop_writer()
+    close_pool()
 
-    cursor.execute(
+    with _acquire() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT PRIMARY KEY,
+                from_msisdn TEXT NOT NULL,
+                to_msisdn TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                text TEXT,
+                created_at TEXT NOT NULL
+            )
         """
-        CREATE TABLE IF NOT EXISTS messages (
-            message_id TEXT PRIMARY KEY,
-            from_msisdn TEXT NOT NULL,
-            to_msisdn TEXT NOT NULL,
-            ts TEXT NOT NULL,
-            text TEXT,
-            created_at TEXT NOT NULL
         )
-    """
-    )
-
-    conn.commit()
-    conn.close()
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_ts_id ON messages(ts, message_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_from_ts "
+            "ON messages(from_msisdn, ts, message_id)"
+        )
 
+        # Trigram full-text index over text, kept in sync by triggers.
+        # Trigram tokens let SQLite answer LIKE '%q%' from the index. Rows
+        # are keyed by message_id rather than the implicit rowid, which
+        # VACUUM may renumber on a table with a TEXT primary key.
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='messages_fts'"
+        ).fetchone()
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                message_id UNINDEXED,
+                text,
+                tokenize='trigram'
+            )
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages
+            BEGIN
+                INSERT INTO messages_fts(message_id, text)
+                VALUES (new.message_id, new.text);
+            END
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages
+            BEGIN
+                DELETE FROM messages_fts WHERE message_id = old.message_id;
+            END
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE ON messages
+            BEGIN
+                DELETE FROM messages_fts WHERE message_id = old.message_id;
+                INSERT INTO messages_fts(message_id, text)
+                VALUES (new.message_id, new.text);
+            END
+        """
+        )
+        if not fts_exists:
+            # Index messages stored before the FTS table existed
+            conn.execute(
+                "INSERT INTO messages_fts(message_id, text) "
+                "SELECT message_id, text FROM messages"
+            )
 
-def get_db_connection() -> sqlite3.Connection:
-    """Get database connection."""
-    db_path = config.DATABASE_URL.replace("sqlite:///", "")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+        conn.commit()
 
 
 def is_db_ready() -> bool:
     """Check if database is initialized and accessible."""
     try:
-        db_path = config.DATABASE_URL.replace("sqlite:///", "")
-        conn = sqlite3.connect(db_path, timeout=2)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='messages'"
-        )
-        result = cursor.fetchone()
-        conn.close()
+        with _acquire() as conn:
+            result = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='messages'"
+            ).fetchone()
         return result is not None
     except Exception:
         return False
 
 
-def insert_message(
+def _iso_now_z() -> str:
+    """Current UTC time as ISO-8601 with microseconds and a Z suffix."""
+    global _ts_prefix_cache
+    seconds, micros = divmod(time.time_ns() // 1000, 1_000_000)
+
+    # Date/time formatting only runs once per second
+    cached_seconds, prefix = _ts_prefix_cache
+    if cached_seconds != seconds:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S.", time.gmtime(seconds))
+        _ts_prefix_cache = (seconds, prefix)
+
+    return f"{prefix}{micros:06d}Z"
+
+
+def _write_batch(conn: sqlite3.Connection, batch: List[Tuple[tuple, Future]]) -> None:
+    """Insert a batch of rows in one transaction and resolve their futures."""
+    # Skip rows whose request was cancelled before the write started
+    batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+    if not batch:
+        return
+    rows = [row for row, _ in batch]
+
+    try:
+        inserted = conn.executemany(INSERT_MESSAGE_SQL, rows).rowcount
+
+        if inserted == len(rows):
+            results = [(True, False)] * len(rows)  # success, not duplicate
+        else:
+            # Invariant: messages has no AUTOINCREMENT and rows are never given
+            # explicit rowids, so SQLite assigns each new row max(rowid) + 1.
+            # The write lock taken by the first insert keeps other writers out
+            # until commit, so this batch's rows are exactly the `inserted`
+            # highest rowids. (SQLite only picks other rowids once the maximum
+            # reaches 2**63 - 1.)
+            new_ids = {
+                message_id
+                for (message_id,) in conn.execute(
+                    "SELECT message_id FROM messages ORDER BY rowid DESC LIMIT ?",
+                    (inserted,),
+                )
+            }
+            results = []
+            for row in rows:
+                # Ignored rows mean message_id already exists (idempotent success)
+                is_duplicate = row[0] not in new_ids
+                new_ids.discard(row[0])
+                results.append((True, is_duplicate))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        results = [(False, False)] * len(rows)  # failure
+
+    for (_, future), result in zip(batch, results):
+        future.set_result(result)
+
+
+def _fail_batch(batch: List[Tuple[tuple, Future]]) -> None:
+    """Resolve every unresolved future in a batch as a failed insert."""
+    for _, future in batch:
+        if not future.done():
+            try:
+                future.set_result((False, False))
+            except InvalidStateError:
+                pass  # Cancelled concurrently
+
+
+def _next_batch() -> Tuple[List[Tuple[tuple, Future]], bool]:
+    """Block for the next insert, then take whatever else is queued behind it."""
+    item = _write_queue.get()
+    if item is None:
+        return [], True
+
+    # Everything queued while the previous commit ran joins this batch
+    batch = [item]
+    while len(batch) < WRITE_BATCH_MAX:
+        try:
+            item = _write_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is None:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def _writer_loop() -> None:
+    """Drain pending inserts and commit them in batches (group commit)."""
+    conn: Optional[sqlite3.Connection] = None
+    try:
+        while True:
+            batch, stop = _next_batch()
+            if batch:
+                try:
+                    if conn is None:
+                        conn = _connect()
+                    _write_batch(conn, batch)
+                except Exception:
+                    # Opening or rolling back failed; never leave a caller waiting
+                    _fail_batch(batch)
+                    if conn is not None:
+                        try:
+                            conn.close()
+                        except Exception:
+                            pass
+                        conn = None  # Reconnect for the next batch
+            if stop:
+                return
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def _ensure_writer() -> None:
+    """Start the writer thread if it is not running."""
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=_writer_loop, name="sqlite-writer", daemon=True
+            )
+            _writer.start()
+
+
+def stop_writer() -> None:
+    """Flush pending inserts and stop the writer thread."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.is_alive():
+            _write_queue.put(None)
+            _writer.join()
+        _writer = None
+
+
+async def insert_message(
     message_id: str,
     from_msisdn: str,
     to_msisdn: str,
@@ -64,31 +311,55 @@ def insert_message(
     """
     Insert message into database.
 
+    The row is handed to the writer thread, which commits it together with
+    any other inserts queued at the same time.
+
     Returns:
         (success: bool, is_duplicate: bool)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    created_at = _iso_now_z()
+    future: Future = Future()
 
-    try:
-        created_at = datetime.utcnow().isoformat() + "Z"
-        cursor.execute(
-            """
-            INSERT INTO messages (message_id, from_msisdn, to_msisdn, ts, text, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
+    _ensure_writer()
+    _write_queue.put(
+        ((message_id, from_msisdn, to_msisdn, ts, text, created_at), future)
+    )
+    return await asyncio.wrap_future(future)
+
+
+def _build_message_queries() -> Dict[int, Tuple[str, str]]:
+    """
+    Precompile (COUNT, SELECT) statements for every get_messages filter mix.
+
+    Keys are bitmasks: 0b100 = from_msisdn, 0b010 = since, 0b001 = q.
+    """
+    filters = (
+        (0b100, "from_msisdn = ?"),
+        (0b010, "ts >= ?"),
+        (
+            0b001,
+            "message_id IN (SELECT message_id FROM messages_fts WHERE text LIKE ?)",
+        ),
+    )
+
+    queries = {}
+    for flags in range(8):
+        where_clauses = [clause for bit, clause in filters if flags & bit]
+        where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
+        queries[flags] = (
+            f"SELECT COUNT(*) FROM messages WHERE {where_clause}",
+            f"""
+            SELECT message_id, from_msisdn, to_msisdn, ts, text, created_at
+            FROM messages
+            WHERE {where_clause}
+            ORDER BY ts ASC, message_id ASC
+            LIMIT ? OFFSET ?
         """,
-            (message_id, from_msisdn, to_msisdn, ts, text, created_at),
         )
-        conn.commit()
-        conn.close()
-        return (True, False)  # success, not duplicate
-    except sqlite3.IntegrityError:
-        # message_id already exists
-        conn.close()
-        return (True, True)  # success (idempotent), is duplicate
-    except Exception:
-        conn.close()
-        return (False, False)  # failure
+    return queries
+
+
+MESSAGE_QUERIES = _build_message_queries()
 
 
 def get_messages(
@@ -97,54 +368,29 @@ def get_messages(
     from_msisdn: Optional[str] = None,
     since: Optional[str] = None,
     q: Optional[str] = None,
-) -> Tuple[List[dict], int]:
+) -> Tuple[List[tuple], int]:
     """
     Retrieve messages with filtering and pagination.
 
+    Rows are plain tuples in column order:
+    (message_id, from_msisdn, to_msisdn, ts, text, created_at)
+
     Returns:
-        (messages: List[dict], total_count: int)
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Build WHERE clause
-    where_clauses = []
-    params = []
-
-    if from_msisdn:
-        where_clauses.append("from_msisdn = ?")
-        params.append(from_msisdn)
-
-    if since:
-        where_clauses.append("ts >= ?")
-        params.append(since)
-
-    if q:
-        where_clauses.append("text LIKE ?")
-        params.append(f"%{q}%")
-
-    where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-    # Get total count
-    cursor.execute(f"SELECT COUNT(*) FROM messages WHERE {where_clause}", params)
-    total_count = cursor.fetchone()[0]
-
-    # Get paginated results
-    query = f"""
-        SELECT message_id, from_msisdn, to_msisdn, ts, text, created_at
-        FROM messages
-        WHERE {where_clause}
-        ORDER BY ts ASC, message_id ASC
-        LIMIT ? OFFSET ?
+        (messages: List[tuple], total_count: int)
     """
-    params.extend([limit, offset])
+    # Select the precompiled statements for this filter combination
+    flags = (bool(from_msisdn) << 2) | (bool(since) << 1) | bool(q)
+    count_sql, select_sql = MESSAGE_QUERIES[flags]
+    params = [p for p in (from_msisdn, since, f"%{q}%" if q else None) if p]
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
+    with _acquire() as conn:
+        # Get total count
+        total_count = conn.execute(count_sql, params).fetchone()[0]
 
-    messages = [dict(row) for row in rows]
-    return (messages, total_count)
+        # Get paginated results
+        rows = conn.execute(select_sql, [*params, limit, offset]).fetchall()
+
+    return (rows, total_count)
 
 
 def get_stats() -> dict:
@@ -155,45 +401,38 @@ def get_stats() -> dict:
         {"total_messages": int, "senders_count": int, "messages_per_sender": [...],
          "first_message_ts": str or None, "last_message_ts": str or None}
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Total messages
-    cursor.execute("SELECT COUNT(*) FROM messages")
-    total_messages = cursor.fetchone()[0]
-
-    # Unique senders
-    cursor.execute("SELECT COUNT(DISTINCT from_msisdn) FROM messages")
-    senders_count = cursor.fetchone()[0]
-
-    # Messages per sender (top 10)
-    cursor.execute(
+    with _acquire() as conn:
+        # Totals and first/last timestamps in one statement; each scalar
+        # subquery is answered from an index
+        row = conn.execute(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM messages),
+                (SELECT COUNT(DISTINCT from_msisdn) FROM messages),
+                (SELECT MIN(ts) FROM messages),
+                (SELECT MAX(ts) FROM messages)
         """
-        SELECT from_msisdn, COUNT(*) as count
-        FROM messages
-        GROUP BY from_msisdn
-        ORDER BY count DESC
-        LIMIT 10
-    """
-    )
-    messages_per_sender = [
-        {"from": row[0], "count": row[1]} for row in cursor.fetchall()
-    ]
-
-    # First and last message timestamps
-    cursor.execute(
-        "SELECT MIN(ts), MAX(ts) FROM messages WHERE ts IS NOT NULL"
-    )
-    result = cursor.fetchone()
-    first_message_ts = result[0] if result[0] else None
-    last_message_ts = result[1] if result[1] else None
-
-    conn.close()
+        ).fetchone()
+        total_messages, senders_count, first_message_ts, last_message_ts = row
+
+        # Messages per sender (top 10)
+        messages_per_sender = [
+            {"from": from_msisdn, "count": count}
+            for from_msisdn, count in conn.execute(
+                """
+                SELECT from_msisdn, COUNT(*) as count
+                FROM messages
+                GROUP BY from_msisdn
+                ORDER BY count DESC
+                LIMIT 10
+            """
+            )
+        ]
 
     return {
         "total_messages": total_messages,
         "senders_count": senders_count,
         "messages_per_sender": messages_per_sender,
-        "first_message_ts": first_message_ts,
-        "last_message_ts": last_message_ts,
+        "first_message_ts": first_message_ts or None,
+        "last_message_ts": last_message_ts or None,
     }
@@ -1,38 +1,74 @@
 """Pytest configuration and shared fixtures."""
 
-import hashlib
-import hmac
-import json
+import functools
 import os
+import sqlite3
 import tempfile
 from pathlib import Path
+from typing import Tuple
 
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
-from app.config import config
-from app.main import app
-from app.storage import init_db
+SECRET = b"test-secret-key"
 
+# Config is read at import time, so the secret must be set before the app loads
+os.environ["WEBHOOK_SECRET"] = SECRET.decode()
 
-@pytest.fixture(autouse=True)
+from app.config import config  # noqa: E402
+from app.main import app, build_hmac_pads  # noqa: E402
+
+
+def pytest_addoption(parser):
+    """Register the --bench flag that enables benchmark tests."""
+    parser.addoption(
+        "--bench",
+        action="store_true",
+        default=False,
+        help="run performance benchmarks (marked 'bench')",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmark tests unless --bench is given."""
+    if config.getoption("--bench"):
+        return
+    skip_bench = pytest.mark.skip(reason="benchmark; run with --bench")
+    for item in items:
+        if item.get_closest_marker("bench"):
+            item.add_marker(skip_bench)
+
+
+@pytest.fixture(scope="module", autouse=True)
 def temp_db():
-    """Use temporary database for each test."""
+    """Use a temporary database shared by the tests of one module."""
     # Create temp file
     fd, path = tempfile.mkstemp(suffix=".db")
     os.close(fd)
 
-    # Set env var
-    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
-    os.environ["WEBHOOK_SECRET"] = "test-secret-key"
-
-    # Initialize
-    init_db()
+    config.DATABASE_URL = f"sqlite:///{path}"
 
-    yield path
+    # Run app startup (schema + signature state) once for the whole module
+    with TestClient(app):
+        yield path
 
     # Cleanup
-    Path(path).unlink(missing_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        Path(path + suffix).unlink(missing_ok=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_db(temp_db):
+    """Empty the shared database after each test."""
+    yield
+    conn = sqlite3.connect(temp_db)
+    try:
+        # The FTS delete trigger keeps messages_fts in step
+        conn.execute("DELETE FROM messages")
+        conn.commit()
+    finally:
+        conn.close()
 
 
 @pytest.fixture
@@ -41,7 +77,22 @@ def client():
     return TestClient(app)
 
 
-def compute_signature(payload: dict, secret: str) -> str:
-    """Compute HMAC-SHA256 signature."""
-    body = json.dumps(payload, separators=(",", ":")).encode()
-    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+# SHA-256 states primed with the HMAC ipad/opad blocks, built once per secret
+hmac_pads = functools.lru_cache(maxsize=None)(build_hmac_pads)
+
+
+def sign_body(body: bytes, secret: bytes) -> str:
+    """Compute HMAC-SHA256 signature of a raw body."""
+    inner_pad, outer_pad = hmac_pads(secret)
+    inner = inner_pad.copy()
+    inner.update(body)
+    outer = outer_pad.copy()
+    outer.update(inner.digest())
+    return outer.hexdigest()
+
+
+def compute_signature(payload: dict, secret: bytes) -> Tuple[bytes, str]:
+    """Serialize a payload and compute its HMAC-SHA256 signature."""
+    # orjson emits compact separators and keeps key insertion order
+    body = orjson.dumps(payload)
+    return body, sign_body(body, secret)
@@ -1,23 +1,14 @@
 """Tests for GET /messages endpoint."""
 
-import hashlib
-import hmac
-import json
-
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from tests.conftest import SECRET, compute_signature
 
 client = TestClient(app)
 
 
-def compute_signature(payload: dict, secret: str) -> str:
-    """Compute HMAC-SHA256 signature."""
-    body = json.dumps(payload, separators=(",", ":")).encode()
-    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-
-
 def insert_test_message(message_id: str, sender: str, ts: str):
     """Helper to insert test message via webhook."""
     payload = {
@@ -27,8 +18,12 @@ def insert_test_message(message_id: str, sender: str, ts: str):
         "ts": ts,
         "text": f"Test message {message_id}",
     }
-    signature = compute_signature(payload, "test-secret-key")
-    client.post("/webhook", json=payload, headers={"X-Signature": signature})
+    body, signature = compute_signature(payload, SECRET)
+    client.post(
+        "/webhook",
+        content=body,
+        headers={"X-Signature": signature, "Content-Type": "application/json"},
+    )
 
 
 def test_messages_empty(temp_db):
@@ -99,8 +94,12 @@ def test_messages_filter_by_text(temp_db):
         "ts": "2025-01-10T10:00:00Z",
         "text": "Hello world",
     }
-    signature1 = compute_signature(payload1, "test-secret-key")
-    client.post("/webhook", json=payload1, headers={"X-Signature": signature1})
+    body1, signature1 = compute_signature(payload1, SECRET)
+    client.post(
+        "/webhook",
+        content=body1,
+        headers={"X-Signature": signature1, "Content-Type": "application/json"},
+    )
 
     payload2 = {
         "message_id": "m2",
@@ -109,8 +108,12 @@ def test_messages_filter_by_text(temp_db):
         "ts": "2025-01-11T10:00:00Z",
         "text": "Goodbye world",
     }
-    signature2 = compute_signature(payload2, "test-secret-key")
-    client.post("/webhook", json=payload2, headers={"X-Signature": signature2})
+    body2, signature2 = compute_signature(payload2, SECRET)
+    client.post(
+        "/webhook",
+        content=body2,
+        headers={"X-Signature": signature2, "Content-Type": "application/json"},
+    )
 
     response = client.get("/messages?q=Hello")
     assert response.status_code == 200
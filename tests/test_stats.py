@@ -1,23 +1,14 @@
 """Tests for GET /stats endpoint."""
 
-import hashlib
-import hmac
-import json
-
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from tests.conftest import SECRET, compute_signature
 
 client = TestClient(app)
 
 
-def compute_signature(payload: dict, secret: str) -> str:
-    """Compute HMAC-SHA256 signature."""
-    body = json.dumps(payload, separators=(",", ":")).encode()
-    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-
-
 def insert_test_message(message_id: str, sender: str, ts: str):
     """Helper to insert test message via webhook."""
     payload = {
@@ -27,8 +18,12 @@ def insert_test_message(message_id: str, sender: str, ts: str):
         "ts": ts,
         "text": f"Test message {message_id}",
     }
-    signature = compute_signature(payload, "test-secret-key")
-    client.post("/webhook", json=payload, headers={"X-Signature": signature})
+    body, signature = compute_signature(payload, SECRET)
+    client.post(
+        "/webhook",
+        content=body,
+        headers={"X-Signature": signature, "Content-Type": "application/json"},
+    )
 
 
 def test_stats_empty(temp_db):
@@ -1,149 +1,358 @@
 """Tests for POST /webhook endpoint."""
 
+import asyncio
 import hashlib
 import hmac
-import json
+from typing import Any, Dict, List, Tuple
 
+import httpx
+import orjson
 import pytest
 from fastapi.testclient import TestClient
+from pydantic import ValidationError
 
+from app import storage
+from app.config import config
 from app.main import app
+from app.models import WebhookMessage
+from tests.conftest import SECRET, compute_signature, sign_body
 
 client = TestClient(app)
 
-
-def compute_signature(payload: dict, secret: str) -> str:
-    """Compute HMAC-SHA256 signature."""
-    body = json.dumps(payload, separators=(",", ":")).encode()
-    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-
-
-def test_webhook_valid_message(temp_db):
-    """Test webhook with valid signature."""
-    payload = {
-        "message_id": "m1",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Hello",
+BASE_PAYLOAD = {
+    "message_id": "m1",
+    "from": "+919876543210",
+    "to": "+14155550100",
+    "ts": "2025-01-15T10:00:00Z",
+    "text": "Hello",
+}
+
+
+# (body, signature) pairs, serialized and signed once at import. Signing here
+# also loads OpenSSL's SHA-256 and primes hmac_pads before any test runs.
+VECTORS = {
+    "valid": compute_signature(BASE_PAYLOAD, SECRET),
+    "invalid_msisdn": compute_signature(
+        {**BASE_PAYLOAD, "from": "919876543210"}, SECRET
+    ),
+    "invalid_ts": compute_signature(
+        {**BASE_PAYLOAD, "ts": "2025-01-15T10:00:00"}, SECRET
+    ),
+}
+
+# Run the validator once so the first timed request doesn't pay for warm-up
+WebhookMessage.model_validate_json(VECTORS["valid"][0])
+
+
+# Canonical body with a fixed-width "mNNN" message_id, spliced in place per use
+BODY_TEMPLATE = bytearray(orjson.dumps({**BASE_PAYLOAD, "message_id": "m000"}))
+MESSAGE_ID_OFFSET = BODY_TEMPLATE.index(b'"m000"') + 2
+
+
+def templated_body(n: int) -> bytes:
+    """Return the canonical body with message_id set to m<n:03d>."""
+    BODY_TEMPLATE[MESSAGE_ID_OFFSET : MESSAGE_ID_OFFSET + 3] = b"%03d" % n
+    return bytes(BODY_TEMPLATE)
+
+
+def webhook_scope(headers: List[Tuple[bytes, bytes]]) -> Dict[str, Any]:
+    """ASGI HTTP scope for a POST /webhook with the given raw headers."""
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/webhook",
+        "raw_path": b"/webhook",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
     }
 
-    signature = compute_signature(payload, "test-secret-key")
+
+async def drive(asgi_app, body: bytes, signature: str) -> int:
+    """POST a signed body straight to the ASGI app and return the status code."""
+    scope = webhook_scope(
+        [
+            (b"x-signature", signature.encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+    )
+    messages = [
+        {"type": "http.request", "body": body, "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+    status_code = 0
+
+    async def receive():
+        return messages.pop(0) if len(messages) > 1 else messages[0]
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await asgi_app(scope, receive, send)
+    return status_code
+
+
+@pytest.mark.parametrize("secret", [b"", SECRET, b"k" * 100])
+@pytest.mark.parametrize("body", [b"", b'{"message_id":"m1"}', b"x" * 1000])
+def test_sign_body_matches_hmac(secret, body):
+    """Test the pad-based signer against the stdlib HMAC reference."""
+    assert sign_body(body, secret) == hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def _spaced(sig: str) -> str:
+    """Space out hex pairs, which bytes.fromhex() would silently skip."""
+    return " ".join(sig[i : i + 2] for i in range(0, 64, 2))
+
+
+@pytest.mark.parametrize(
+    "vector,sign,status",
+    [
+        pytest.param("valid", lambda sig: sig, 200, id="valid"),
+        pytest.param("valid", lambda sig: None, 401, id="missing_signature"),
+        pytest.param(
+            "valid", lambda sig: "invalid_signature_here", 401, id="invalid_signature"
+        ),
+        # Hex case does not matter once decoded to bytes
+        pytest.param("valid", str.upper, 200, id="uppercase_signature"),
+        # A digest prefix decodes fine but must not match
+        pytest.param("valid", lambda sig: sig[:32], 401, id="signature_prefix"),
+        pytest.param("valid", _spaced, 401, id="spaced_signature"),
+        pytest.param("invalid_msisdn", lambda sig: sig, 422, id="invalid_msisdn"),
+        pytest.param("invalid_ts", lambda sig: sig, 422, id="invalid_timestamp"),
+    ],
+)
+def test_webhook_status(vector, sign, status, temp_db):
+    """Test signature checks and payload validation map to the right status."""
+    body, signature = VECTORS[vector]
+    headers = {"Content-Type": "application/json"}
+    x_signature = sign(signature)
+    if x_signature is not None:
+        headers["X-Signature"] = x_signature
+
+    response = client.post("/webhook", content=body, headers=headers)
+
+    assert response.status_code == status
+    if status == 200:
+        assert response.json() == {"status": "ok"}
+    elif status == 401:
+        assert response.json()["detail"] == "invalid signature"
+
+
+def test_webhook_duplicate_http(temp_db):
+    """Test a duplicate webhook is acknowledged like a new one."""
+    body, signature = VECTORS["valid"]
+    storage_row = (
+        BASE_PAYLOAD["message_id"],
+        BASE_PAYLOAD["from"],
+        BASE_PAYLOAD["to"],
+        BASE_PAYLOAD["ts"],
+        BASE_PAYLOAD["text"],
+    )
+    assert asyncio.run(storage.insert_message(*storage_row)) == (True, False)
 
     response = client.post(
         "/webhook",
-        json=payload,
-        headers={"X-Signature": signature},
+        content=body,
+        headers={"X-Signature": signature, "Content-Type": "application/json"},
     )
 
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+    assert client.get("/messages").json()["total"] == 1
 
 
-def test_webhook_missing_signature(temp_db):
-    """Test webhook without signature."""
-    payload = {
-        "message_id": "m2",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Hello",
-    }
+def test_repository_idempotent_insert(temp_db):
+    """Test inserting the same message_id twice stores it once."""
+    row = ("m1", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z", "Hello")
 
-    response = client.post("/webhook", json=payload)
+    assert asyncio.run(storage.insert_message(*row)) == (True, False)
+    assert asyncio.run(storage.insert_message(*row)) == (True, True)
+    assert storage.get_stats()["total_messages"] == 1
 
-    assert response.status_code == 401
-    assert response.json()["detail"] == "invalid signature"
 
+def test_webhook_insert_fails_on_unopenable_db(temp_db, monkeypatch, tmp_path):
+    """Test an insert the writer cannot open the database for fails, not hangs."""
+    row = tuple(BASE_PAYLOAD.values())
 
-def test_webhook_invalid_signature(temp_db):
-    """Test webhook with wrong signature."""
-    payload = {
-        "message_id": "m3",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Hello",
-    }
+    # Restart the writer so its next connection uses the broken path
+    storage.stop_writer()
+    missing = tmp_path / "missing" / "app.db"
+    monkeypatch.setattr(config, "DATABASE_URL", f"sqlite:///{missing}")
+
+    result = asyncio.run(asyncio.wait_for(storage.insert_message(*row), timeout=5))
+    assert result == (False, False)
 
+    body, signature = VECTORS["valid"]
     response = client.post(
         "/webhook",
-        json=payload,
-        headers={"X-Signature": "invalid_signature_here"},
+        content=body,
+        headers={"X-Signature": signature, "Content-Type": "application/json"},
     )
 
-    assert response.status_code == 401
-    assert response.json()["detail"] == "invalid signature"
-
-
-def test_webhook_duplicate_message(temp_db):
-    """Test duplicate message is idempotent."""
-    payload = {
-        "message_id": "m4",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Hello",
-    }
-
-    signature = compute_signature(payload, "test-secret-key")
+    assert response.status_code == 500
 
-    # First request
-    response1 = client.post(
-        "/webhook",
-        json=payload,
-        headers={"X-Signature": signature},
-    )
-    assert response1.status_code == 200
+    storage.stop_writer()
 
-    # Second request (duplicate)
-    response2 = client.post(
-        "/webhook",
-        json=payload,
-        headers={"X-Signature": signature},
-    )
-    assert response2.status_code == 200
-    assert response2.json() == {"status": "ok"}
-
-
-def test_webhook_invalid_msisdn(temp_db):
-    """Test validation of phone numbers."""
-    payload = {
-        "message_id": "m5",
-        "from": "919876543210",  # Missing +
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Hello",
-    }
-
-    signature = compute_signature(payload, "test-secret-key")
 
+def test_webhook_payload_too_large(temp_db):
+    """Test oversized body is rejected before signature verification."""
     response = client.post(
         "/webhook",
-        json=payload,
-        headers={"X-Signature": signature},
+        content=b"x" * (config.MAX_BODY_BYTES + 1),
+        headers={"X-Signature": "0" * 64, "Content-Type": "application/json"},
     )
 
-    # Pydantic validation should fail (422)
-    assert response.status_code == 422
+    assert response.status_code == 413
+
+
+def test_webhook_chunked_payload_too_large(temp_db):
+    """Test a body without Content-Length is cut off once over the limit."""
+    chunk = b"x" * 4096
+    # The client never finishes the body; reading it all would end in a disconnect
+    chunks_before_disconnect = 2 * (config.MAX_BODY_BYTES // len(chunk) + 1)
+    received = 0
+    status_code = 0
+
+    async def receive():
+        nonlocal received
+        if received == chunks_before_disconnect:
+            return {"type": "http.disconnect"}
+        received += 1
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    scope = webhook_scope(
+        [
+            (b"x-signature", b"0" * 64),
+            (b"content-type", b"application/json"),
+            (b"transfer-encoding", b"chunked"),
+        ]
+    )
+    asyncio.run(app(scope, receive, send))
 
+    assert status_code == 413
 
-def test_webhook_invalid_timestamp(temp_db):
-    """Test validation of timestamp."""
-    payload = {
-        "message_id": "m6",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00",  # Missing Z
-        "text": "Hello",
-    }
 
-    signature = compute_signature(payload, "test-secret-key")
+def test_webhook_malformed_content_length(temp_db):
+    """Test an unparsable Content-Length is ignored rather than a 500."""
+    body, _ = VECTORS["valid"]
 
     response = client.post(
         "/webhook",
-        json=payload,
-        headers={"X-Signature": signature},
+        content=body,
+        headers={
+            "X-Signature": "0" * 64,
+            "Content-Type": "application/json",
+            "Content-Length": "abc",
+        },
     )
 
-    assert response.status_code == 422
+    assert response.status_code == 401
+
+
+def test_webhook_direct_asgi_burst(temp_db):
+    """Test a burst of signed webhooks driven straight through the ASGI app."""
+    bodies = [templated_body(i) for i in range(50)]
+
+    async def run():
+        return [await drive(app, body, sign_body(body, SECRET)) for body in bodies]
+
+    statuses = asyncio.run(run())
+
+    assert statuses == [200] * len(bodies)
+    assert client.get("/messages").json()["total"] == len(bodies)
+
+
+@pytest.mark.asyncio
+async def test_webhook_load(temp_db):
+    """Test concurrent duplicate webhooks all succeed and store one row."""
+    body, signature = VECTORS["valid"]
+    headers = {"X-Signature": signature, "Content-Type": "application/json"}
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        responses = await asyncio.gather(
+            *[c.post("/webhook", content=body, headers=headers) for _ in range(50)]
+        )
+        messages = await c.get("/messages")
+
+    assert [r.status_code for r in responses] == [200] * len(responses)
+    assert messages.json()["total"] == 1
+
+
+def build_message(**overrides) -> WebhookMessage:
+    """Validate a webhook payload with selected fields replaced."""
+    return WebhookMessage.model_validate({**BASE_PAYLOAD, **overrides})
+
+
+@pytest.mark.parametrize(
+    "ts",
+    [
+        "2025-01-15T10:00:00Z",
+        "2025-01-15T10:00:00.123456Z",
+        "2024-02-29T10:00:00Z",  # Leap day
+        "2025-01-31T23:59:59Z",
+        "2025-01-15T10:00Z",  # No seconds
+        "2025-01-15 10:00:00Z",  # Space separator
+        "2025-01-15T10:00:00,5Z",  # Comma fraction
+    ],
+)
+def test_webhook_timestamp_accepted(ts):
+    """Test timestamps that datetime.fromisoformat accepts are valid."""
+    assert build_message(ts=ts).ts == ts
+
+
+@pytest.mark.parametrize(
+    "ts",
+    [
+        "2025-01-15T10:00:00",  # Missing Z
+        "2025-01-15T10:00:00+00:00",
+        "2025-02-30T10:00:00Z",  # Not a calendar date
+        "2025-02-29T10:00:00Z",
+        "2025-13-01T10:00:00Z",
+        "2025-01-15T24:00:00Z",
+        "0000-01-01T00:00:00Z",
+        "not-a-timestamp",
+    ],
+)
+def test_webhook_timestamp_rejected(ts):
+    """Test malformed or impossible timestamps fail validation."""
+    with pytest.raises(ValidationError):
+        build_message(ts=ts)
+
+
+@pytest.mark.parametrize("msisdn", ["919876543210", "+", "+91 98765", "+91\u00b2"])
+def test_webhook_msisdn_rejected(msisdn):
+    """Test numbers without '+' or with non-ASCII-digit characters fail."""
+    with pytest.raises(ValidationError):
+        build_message(**{"from": msisdn})
+
+
+@pytest.mark.bench
+def test_bench_hmac_sha256_signature(benchmark):
+    """Benchmark HMAC-SHA256 signing of the canonical webhook payload."""
+    benchmark(compute_signature, BASE_PAYLOAD, SECRET)
+
+
+@pytest.mark.bench
+def test_bench_blake3_keyed_signature(benchmark):
+    """Benchmark keyed BLAKE3 over the same payload, as a MAC comparator."""
+    blake3 = pytest.importorskip("blake3").blake3
+    key = SECRET.ljust(32, b"\x00")  # BLAKE3 keyed mode needs a 32-byte key
+
+    def keyed_blake3(payload: dict, _secret: bytes) -> str:
+        return blake3(orjson.dumps(payload), key=key).hexdigest()
+
+    benchmark(keyed_blake3, BASE_PAYLOAD, SECRET)